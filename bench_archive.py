@@ -0,0 +1,48 @@
+"""
+Timing regression check for page_archive.html_to_text.
+
+Runs html_to_text on 1 MB pages (the most fetch_title downloads) built from
+unclosed scripts, comments and tags, which made the old regex-based
+stripper quadratic. Exits non-zero if any page takes longer than the limit.
+
+    python bench_archive.py [--limit SECONDS]
+"""
+import argparse
+import sys
+import time
+
+from page_archive import html_to_text
+
+PAGE_SIZE = 1024 * 1024
+
+ADVERSARIAL = {
+    'unclosed <script>': '<script>',
+    'unclosed <style>': '<STYLE>',
+    'unclosed <!--': '<!--',
+    'unclosed </script': '<script></script',
+    'unclosed tags': '<a',
+    'bare <': '<',
+    'realistic page': '<div class="row"><p>Some text &amp; a <a href="/x">link</a></p></div>\n',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check html_to_text stays linear on hostile pages.")
+    parser.add_argument('--limit', type=float, default=1.0, help="Seconds allowed per 1 MB page")
+    args = parser.parse_args()
+
+    failed = False
+    for name, unit in ADVERSARIAL.items():
+        page = unit * (PAGE_SIZE // len(unit))
+        started = time.perf_counter()
+        html_to_text(page)
+        seconds = time.perf_counter() - started
+        status = "✅" if seconds <= args.limit else "❌"
+        failed = failed or seconds > args.limit
+        print(f"{status} {name:<20}{seconds * 1000:>10.1f}ms")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
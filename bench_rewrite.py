@@ -0,0 +1,70 @@
+"""
+Micro-benchmark for the --fix-titles rewrite pipeline in link_viewer.py.
+
+Times the classify/scan pass and the streaming rewrite pass per line on a
+synthetic bookmark file. Titles are supplied up front, so no network is used.
+
+    python bench_rewrite.py [--lines N] [--number N]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import timeit
+
+from link_viewer import apply_rewrite, scan_links, select_kinds
+
+
+def write_bookmarks(path, lines):
+    """Headings every 50 lines, then a mix of titled links, bare URLs and notes."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            if i % 50 == 0:
+                f.write(f"## Category {i // 50}\n")
+            elif i % 10 == 0:
+                f.write(f"https://example.com/bare/{i}\n")
+            elif i % 7 == 0:
+                f.write(f"Some note about link {i}\n")
+            else:
+                f.write(f"[Link {i}](https://example.com/page/{i})  \n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the title rewrite pipeline.")
+    parser.add_argument('--lines', type=int, default=200_000, help="Lines in the synthetic file")
+    parser.add_argument('--number', type=int, default=3, help="Loops per timing")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        source = os.path.join(directory, 'source.md')
+        target = os.path.join(directory, 'links.md')
+        write_bookmarks(source, args.lines)
+        selector = select_kinds('bare', 'link')
+
+        plan, line_count = scan_links(source, selector)
+        titles = {url: f"Fresh title for {url}" for _, _, url, _ in plan}
+
+        def scan():
+            scan_links(source, selector)
+
+        def rewrite():
+            shutil.copyfile(source, target)
+            apply_rewrite(target, plan, titles)
+
+        def copy_only():
+            shutil.copyfile(source, target)
+
+        copy_time = min(timeit.repeat(copy_only, number=args.number, repeat=3)) / args.number
+        for label, func in (('scan', scan), ('rewrite', rewrite)):
+            seconds = min(timeit.repeat(func, number=args.number, repeat=3)) / args.number
+            if func is rewrite:
+                seconds -= copy_time
+            print(f"{label:<10}{line_count:>10} lines {seconds * 1000:>10.1f}ms"
+                  f"{line_count / seconds:>14,.0f} lines/s  ({len(plan)} links selected)")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
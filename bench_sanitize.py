@@ -0,0 +1,125 @@
+"""
+Micro-benchmark for sanitize.py against the original per-call implementations.
+
+Every input is first checked for byte-identical output, then timed.
+
+    python bench_sanitize.py [--number N]
+"""
+import argparse
+import random
+import re
+import string
+import timeit
+
+from sanitize import sanitize_terminal_output, sanitize_title, sanitize_titles
+
+
+def legacy_sanitize_terminal_output(text):
+    """Original implementation, kept as the reference."""
+    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+    text = ansi_escape.sub('', text)
+    text = ''.join(char for char in text if ord(char) >= 32 or char in '\n\t')
+    return text
+
+
+def legacy_sanitize_title(title):
+    """Original implementation, kept as the reference."""
+    title = legacy_sanitize_terminal_output(title)
+    allowed = string.printable + "★☆♡♥✨✿✼♪⋆★→←↑↓&*/|"
+    title = title.replace('[', '').replace(']', '')
+    title = title.replace('%', '﹪')
+    sanitized = ''.join(
+        c for c in title
+        if c in allowed or c.isalnum() or c in [' ', '.', '-', '_', '#', '(', ')']
+    )
+    if len(sanitized) > 200:
+        sanitized = sanitized[:200] + '...'
+    return sanitized
+
+
+def realistic_titles():
+    return [
+        "Python Official Documentation",
+        "JavaScript | MDN",
+        "Hacker News",
+        "GitHub - psf/requests: A simple, yet elegant, HTTP library.",
+        "100% Free [Updated 2024] Course — Learn Rust ✨",
+        "Ünïcödé Ärticle – ça marche · 日本語のタイトル",
+        "The Verge",
+        "Khan Academy | Free Online Courses, Lessons & Practice",
+    ] * 25
+
+
+def escape_heavy_titles():
+    rng = random.Random(1)
+    codes = ['\x1b[31m', '\x1b[0m', '\x1b[1;32;40m', '\x1b]', '\x1bM', '\x07', '\r', '\x00']
+    return [
+        ''.join(rng.choice(codes) + rng.choice(string.ascii_letters) for _ in range(60))
+        for _ in range(200)
+    ]
+
+
+def huge_titles():
+    rng = random.Random(2)
+    alphabet = string.printable + '[]%★☆日本語éü\x1b\x7f​'
+    return [''.join(rng.choice(alphabet) for _ in range(100_000)) for _ in range(5)]
+
+
+def fuzz_titles(count=2000):
+    rng = random.Random(3)
+    return [
+        ''.join(chr(rng.randrange(0, 0x3000)) for _ in range(rng.randrange(0, 300)))
+        for _ in range(count)
+    ]
+
+
+def check_identical(name, titles):
+    for title in titles:
+        assert sanitize_title(title) == legacy_sanitize_title(title), (name, title)
+        assert sanitize_terminal_output(title) == legacy_sanitize_terminal_output(title), (name, title)
+    assert sanitize_titles(titles) == [legacy_sanitize_title(title) for title in titles], name
+
+
+def bench(label, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+    return label, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark title and terminal sanitization.")
+    parser.add_argument('--number', type=int, default=20, help="Loops per timing")
+    args = parser.parse_args()
+
+    suites = {
+        'realistic': realistic_titles(),
+        'escape-heavy': escape_heavy_titles(),
+        'huge': huge_titles(),
+    }
+
+    check_identical('fuzz', fuzz_titles())
+    for name, titles in suites.items():
+        check_identical(name, titles)
+    print("✅ Output identical to the original functions on all inputs.\n")
+
+    print(f"{'suite':<14}{'function':<26}{'legacy':>12}{'new':>12}{'speedup':>10}")
+    for name, titles in suites.items():
+        rows = [
+            ('sanitize_title',
+             lambda: [legacy_sanitize_title(t) for t in titles],
+             lambda: [sanitize_title(t) for t in titles]),
+            ('sanitize_titles (batch)',
+             lambda: [legacy_sanitize_title(t) for t in titles],
+             lambda: sanitize_titles(titles)),
+            ('sanitize_terminal_output',
+             lambda: [legacy_sanitize_terminal_output(t) for t in titles],
+             lambda: [sanitize_terminal_output(t) for t in titles]),
+        ]
+        for function, legacy, new in rows:
+            _, legacy_time = bench(function, legacy, args.number)
+            _, new_time = bench(function, new, args.number)
+            print(f"{name:<14}{function:<26}{legacy_time * 1000:>10.3f}ms{new_time * 1000:>10.3f}ms"
+                  f"{legacy_time / new_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,33 @@ import webbrowser
 import os
 import argparse
 import random
-import string
 import socket
+import json
+import contextlib
+import struct
+import sys
+import shutil
+import fnmatch
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 from urllib.parse import urlparse
+from page_archive import COMPACT_GARBAGE_RATIO, PageArchive
+from sanitize import sanitize_terminal_output, sanitize_title, sanitize_titles
+from sampling import RecentRing, Reservoir
+
+# Number of concurrent title fetches shared across all files in one run
+FETCH_WORKERS = 8
+
+# Safer regex for markdown links
+LINK_PATTERN = re.compile(r'\[([^\]]+?)\]\((https?://[^\s)]+)\)')
+MENU_HEADING_PATTERN = re.compile(r'^(##)\s*(.*)')
+
+# Sidecar '<file>.offsets': header, then one little-endian int64 byte offset per link
+OFFSET_INDEX_MAGIC = b'MDLINKS1'
+OFFSET_INDEX_HEADER = struct.Struct('<8sqqq')  # magic, mtime_ns, size, link count
 
 def is_safe_url(url):
     """Validate URL safety before fetching."""
@@ -61,17 +83,6 @@ def is_safe_url(url):
         print(f"⚠️  URL validation error: {e}")
         return False
 
-def sanitize_terminal_output(text):
-    """Remove ANSI escape codes and control characters from text."""
-    # Remove ANSI escape sequences
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    text = ansi_escape.sub('', text)
-    
-    # Remove other control characters except newline/tab
-    text = ''.join(char for char in text if ord(char) >= 32 or char in '\n\t')
-    
-    return text
-
 def parse_markdown(file_path):
     """
     Parse the markdown file and extract headings and links categorized by headings.
@@ -86,16 +97,13 @@ def parse_markdown(file_path):
     categorized_links = {}
     current_heading = None
 
-    # Safer regex for markdown links
-    link_pattern = re.compile(r'\[([^\]]+?)\]\((https?://[^\s)]+)\)')
-
     for line in content.splitlines():
-        heading_match = re.match(r'^(##)\s*(.*)', line)
+        heading_match = MENU_HEADING_PATTERN.match(line)
         if heading_match:
             current_heading = heading_match.group(2).strip()
             categorized_links[current_heading] = []
         elif current_heading:
-            for match in link_pattern.finditer(line):
+            for match in LINK_PATTERN.finditer(line):
                 link_text, link_url = match.groups()
                 categorized_links[current_heading].append((link_text, link_url))
 
@@ -122,20 +130,164 @@ def display_menu(categorized_links):
     
     return selected_link
 
-def random_link(categorized_links):
+def iter_links(markdown_file):
+    """
+    Stream (heading, position, title, url, offset) for every link in the file,
+    following the same rules as parse_markdown. position is the link's 1-based
+    index within its category and offset the byte offset of its '['.
+    """
+    heading, position, line_offset = None, 0, 0
+
+    with open(markdown_file, 'rb') as f:
+        for raw in f:
+            line = raw.decode('utf-8')
+            heading_match = MENU_HEADING_PATTERN.match(line.lstrip('﻿'))
+            if heading_match:
+                heading, position = heading_match.group(2).strip(), 0
+            elif heading and '](' in line:
+                for match in LINK_PATTERN.finditer(line):
+                    position += 1
+                    offset = line_offset + len(line[:match.start()].encode('utf-8'))
+                    yield heading, position, match.group(1), match.group(2), offset
+            line_offset += len(raw)
+
+def offset_index_path(markdown_file):
+    return markdown_file + '.offsets'
+
+def write_offset_index(markdown_file, stat, offsets):
+    """Write the byte offsets of every link, stamped with the file's mtime and size."""
+    directory = os.path.dirname(os.path.abspath(markdown_file))
+    with tempfile.NamedTemporaryFile('wb', dir=directory, suffix='.tmp', delete=False) as f:
+        f.write(OFFSET_INDEX_HEADER.pack(OFFSET_INDEX_MAGIC, stat.st_mtime_ns, stat.st_size, len(offsets)))
+        offsets.tofile(f)
+    os.replace(f.name, offset_index_path(markdown_file))
+
+def offset_index_count(markdown_file):
+    """Number of links in the file's offset index, or None if it is missing or stale."""
+    try:
+        with open(offset_index_path(markdown_file), 'rb') as f:
+            header = f.read(OFFSET_INDEX_HEADER.size)
+        stat = os.stat(markdown_file)
+    except OSError:
+        return None
+    if len(header) != OFFSET_INDEX_HEADER.size:
+        return None
+    magic, mtime_ns, size, count = OFFSET_INDEX_HEADER.unpack(header)
+    if magic != OFFSET_INDEX_MAGIC or (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size):
+        return None
+    return count
+
+def link_at(markdown_file, index):
+    """Read the index-th link of the file in O(1) through its offset index."""
+    with open(offset_index_path(markdown_file), 'rb') as f:
+        f.seek(OFFSET_INDEX_HEADER.size + index * 8)
+        offset = struct.unpack('<q', f.read(8))[0]
+    with open(markdown_file, 'rb') as f:
+        f.seek(offset)
+        match = LINK_PATTERN.match(f.readline().decode('utf-8'))
+    return match.groups() if match else None
+
+def _indexed_random_link(paths, recent, rng, attempts=8):
     """
-    Select a random link from all available links across all categories.
+    Uniform pick through the offset indexes, if every file has a fresh one.
+    Returns (path, url), or None to fall back to streaming.
     """
-    all_links = []
-    for heading in categorized_links.values():
-        all_links.extend(heading)  # Flatten the list of links
+    counts = [offset_index_count(path) for path in paths]
+    if None in counts or not sum(counts):
+        return None
+
+    for _ in range(attempts):
+        index = rng.randrange(sum(counts))
+        for path, count in zip(paths, counts):
+            if index < count:
+                break
+            index -= count
+        link = link_at(path, index)
+        if link is None:
+            return None
+        if link[1] not in recent:
+            return path, link[1]
+    return None
 
-    if not all_links:
-        print("No links available.")
+def pick_random_link(paths, weight='uniform', categories=None, recent=(), last=(), rng=random):
+    """
+    Return (path, url) for a random link across the files, or None if there
+    are no links.
+
+    weight is 'uniform' (every link equally likely), 'category' (every
+    category equally likely, then a link within it) or 'recent' (links lower
+    in their category, i.e. added later, are favoured linearly). URLs in
+    recent are avoided unless nothing else is left, and URLs in last (the
+    ones shown most recently) are only repeated if nothing else is left.
+
+    An unfiltered uniform pick is O(1) when every file has a fresh offset
+    index. Everything else is reservoir-sampled in one streaming pass without
+    building a list of links, with each file sampled in its own worker
+    process and the per-file reservoirs merged; unfiltered passes also
+    rebuild the indexes.
+    """
+    if weight == 'uniform' and not categories:
+        picked = _indexed_random_link(paths, recent, rng)
+        if picked:
+            return picked
+
+    seeds = [rng.getrandbits(64) for _ in paths]
+    tasks = [(path, weight, categories, recent, last, seed) for path, seed in zip(paths, seeds)]
+    if len(paths) == 1:
+        results = [_sample_file(*tasks[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as pool:
+            results = list(pool.map(_sample_file, *zip(*tasks)))
+
+    # Merge per-file reservoirs: the highest key in each group wins
+    tiers = ({}, {}, {})
+    for result in results:
+        for merged, picks in zip(tiers, result):
+            for group, (key, item) in picks.items():
+                if group not in merged or key > merged[group][0]:
+                    merged[group] = (key, item)
+
+    picks = next((tier for tier in tiers if tier), None)
+    if not picks:
         return None
+    return picks[rng.choice(list(picks))][1]
 
-    random_choice = random.choice(all_links)  # Choose a random link
-    return random_choice[1]  # Return the URL
+def _sample_file(path, weight, categories, recent, last, seed):
+    """
+    Reservoir-sample one file for pick_random_link, rebuilding its offset
+    index on unfiltered passes. Runs in a worker process when several files
+    are sampled, so it gets its own seed. Returns (fresh, avoided, repeat),
+    each mapping a group to the (key, (path, url)) of its current pick.
+    """
+    rng = random.Random(seed)
+    tiers = ({}, {}, {})
+    stat = os.stat(path)
+    offsets = array('q') if not categories else None
+
+    for heading, position, _, url, offset in iter_links(path):
+        if offsets is not None:
+            offsets.append(offset)
+        if categories and heading not in categories:
+            continue
+        if url in last:
+            reservoirs = tiers[2]
+        elif url in recent:
+            reservoirs = tiers[1]
+        else:
+            reservoirs = tiers[0]
+        group = heading if weight == 'category' else None
+        if group not in reservoirs:
+            reservoirs[group] = Reservoir(rng)
+        reservoirs[group].offer((path, url), position if weight == 'recent' else 1.0)
+
+    if offsets is not None and os.stat(path).st_mtime_ns == stat.st_mtime_ns:
+        write_offset_index(path, stat, offsets)
+
+    return tuple({group: (reservoir.key, reservoir.item) for group, reservoir in reservoirs.items()}
+                 for reservoirs in tiers)
+
+def recent_ring_path(markdown_file):
+    return markdown_file + '.recent'
 
 def open_in_browser(url):
     """
@@ -144,32 +296,7 @@ def open_in_browser(url):
     print(f"Opening: {url}")
     webbrowser.open(url)
 
-def sanitize_title(title):
-    # Remove ANSI escape codes and control characters
-    title = sanitize_terminal_output(title)
-    
-    # Allow readable characters + emojis, remove control chars or escape sequences
-    allowed = string.printable + "★☆♡♥✨✿✼♪⋆★→←↑↓&*/|"
-    
-    # Remove square brackets
-    title = title.replace('[', '').replace(']', '')
-    
-    # Replace percent sign with a safe alternative
-    title = title.replace('%', '﹪')  # Fullwidth percent sign (U+FF05)
-
-    # Keep only allowed characters
-    sanitized = ''.join(
-        c for c in title
-        if c in allowed or c.isalnum() or c in [' ', '.', '-', '_', '#', '(', ')']
-    )
-    
-    # Limit title length
-    if len(sanitized) > 200:
-        sanitized = sanitized[:200] + '...'
-    
-    return sanitized
-
-def add_link(markdown_file, title, url, category, categorized_links, auto_fetch=False, prompt_title=False):
+def add_link(markdown_file, title, url, category, categorized_links, auto_fetch=False, prompt_title=False, archive=None):
     """
     Add a link to the specified category in the markdown file.
     If title is None, fetch it from the URL (auto_fetch) or prompt user (prompt_title).
@@ -191,14 +318,14 @@ def add_link(markdown_file, title, url, category, categorized_links, auto_fetch=
                 title = sanitize_title(user_title)
             else:
                 # If user doesn't provide title, try to fetch it
-                title = fetch_title(url)
+                title = fetch_title(url, [archive] if archive is not None else ())
                 if title:
                     title = sanitize_title(title)
                 else:
                     title = url
         elif auto_fetch:
             # Automatically fetch title from URL
-            title = fetch_title(url)
+            title = fetch_title(url, [archive] if archive is not None else ())
             if title:
                 title = sanitize_title(title)
             else:
@@ -244,8 +371,11 @@ def add_link(markdown_file, title, url, category, categorized_links, auto_fetch=
     print(f"Added to '{category}': {markdown_link.strip()}")
 
 
-def fetch_title(url):
-    """Fetch page title from URL with security protections."""
+def fetch_title(url, archives=()):
+    """Fetch page title from URL with security protections.
+
+    The downloaded page is also stored in every archive in ``archives``.
+    """
     # Validate URL first
     if not is_safe_url(url):
         return None
@@ -268,6 +398,9 @@ def fetch_title(url):
             
             # Decode safely
             html = content.decode('utf-8', errors='ignore')
+
+            for archive in archives:
+                archive.store(url, html)
             
             # Extract title
             match = re.search(r'<title>(.*?)</title>', html, re.IGNORECASE | re.DOTALL)
@@ -286,245 +419,254 @@ def fetch_title(url):
         print(f"⚠️  Could not fetch title from {url}: {e}")
     return None
 
-def fix_bare_links(markdown_file, stdout=False):
-    url_pattern = re.compile(r'^\s*(https?://\S+)\s*$')
-    link_pattern = re.compile(r'^\s*\[.*\]\(https?://\S+\)\s*$')
-
-    updated_lines = []
-    updated = False
+def fetch_titles(url_archives, workers=FETCH_WORKERS):
+    """
+    Fetch titles for many URLs through one shared thread pool.
+    url_archives maps each URL to the archives its page is stored in; a URL
+    listed in several files is fetched once and archived for each of them.
+    Returns a dict of URL -> title, with None for failed fetches.
+    """
+    if not url_archives:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(url_archives))) as pool:
+        futures = {url: pool.submit(fetch_title, url, archives) for url, archives in url_archives.items()}
+        return {url: future.result() for url, future in futures.items()}
+
+# Line patterns shared by the rewrite pipeline, compiled once
+HEADING_PATTERN = re.compile(r'^##\s+(.*)$')
+LINK_LINE_PATTERN = re.compile(r'^\s*\[(.*?)\]\((https?://\S+)\)\s*$')
+BARE_URL_PATTERN = re.compile(r'^\s*(https?://\S+)\s*$')
+
+def classify_line(stripped):
+    """
+    Classify a stripped line as ('heading', name, None), ('link', url, title),
+    ('bare', url, None) or ('other', None, None).
+    """
+    if stripped.startswith('#'):
+        match = HEADING_PATTERN.match(stripped)
+        if match:
+            return 'heading', match.group(1).strip(), None
+    elif stripped.startswith('['):
+        match = LINK_LINE_PATTERN.match(stripped)
+        if match:
+            return 'link', match.group(2), match.group(1)
+    elif stripped.startswith('http'):
+        match = BARE_URL_PATTERN.match(stripped)
+        if match:
+            return 'bare', match.group(1), None
+    return 'other', None, None
+
+# Selectors decide which link lines get a new title. Each one is called
+# as selector(kind, url, category) and they compose with combine_selectors.
+
+def select_kinds(*kinds):
+    """Select 'bare' URL lines, 'link' lines, or both."""
+    return lambda kind, url, category: kind in kinds
+
+def select_categories(categories):
+    """Select lines under any of the given '## ' categories."""
+    categories = set(categories)
+    return lambda kind, url, category: category in categories
+
+def select_url_globs(globs):
+    """Select URLs matching any of the given shell-style globs."""
+    pattern = re.compile('|'.join(fnmatch.translate(glob) for glob in globs))
+    return lambda kind, url, category: pattern.match(url) is not None
+
+def combine_selectors(*selectors):
+    """Select lines that every given selector selects."""
+    return lambda kind, url, category: all(selector(kind, url, category) for selector in selectors)
+
+def scan_links(markdown_file, selector):
+    """
+    Classify every line of the file once. Returns (plan, line_count), where
+    plan lists (line_number, kind, url, old_title) for each selected line.
+    """
+    plan = []
+    category = None
+    line_count = 0
 
     with open(markdown_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            stripped = line.strip()
-
-            # Leave category headings and markdown links unchanged
-            if stripped.startswith("##") or link_pattern.match(stripped):
-                updated_lines.append(line)
-                continue
-
-            # Bare URL line?
-            url_match = url_pattern.match(stripped)
-            if url_match:
-                url = url_match.group(1)
-                print(f"🔍 Fetching title for: {url}")
-                title = fetch_title(url)
-                if title:
-                    formatted = f"[{sanitize_title(title)}]({url})\n"
-                    updated_lines.append(formatted)
-                    updated = True
-                    print(f"✅ Converted to: {formatted.strip()}")
-                else:
-                    print(f"⚠️  Could not fetch title for: {url}")
-                    updated_lines.append(line)
-            else:
-                updated_lines.append(line)
-
-    if stdout:
-        print("\n📄 Final Output:\n" + "-" * 40)
-        for line in updated_lines:
-            print(line, end="")
-        print("\n" + "-" * 40)
-        print("✅ Preview complete. No file written.")
-    else:
-        if updated:
-            with open(markdown_file, 'w', encoding='utf-8') as f:
-                f.writelines(updated_lines)
-            print("✅ File updated with new titles.")
-        else:
-            print("ℹ️  No bare links found to update.")
+        for line_count, line in enumerate(f, 1):
+            kind, value, title = classify_line(line.strip())
+            if kind == 'heading':
+                category = value
+            elif kind != 'other' and selector(kind, value, category):
+                plan.append((line_count, kind, value, title))
 
+    return plan, line_count
 
+def _line_unchanged(line, change):
+    """True if a line still holds the link it was planned for at scan time."""
+    kind, value, _ = classify_line(line.strip())
+    return (kind, value) == change[:2]
 
-def fix_bare_links_in_category(markdown_file, target_category, stdout=False):
-    url_pattern = re.compile(r'^\s*(https?://\S+)\s*$')
-    link_pattern = re.compile(r'^\s*\[.*\]\(https?://\S+\)\s*$')
-    heading_pattern = re.compile(r'^##\s+(.*)')
-
-    updated_lines = []
-    updated = False
-    inside_target_category = False
-
-    with open(markdown_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            stripped = line.strip()
-
-            # Detect if we've entered a new category
-            heading_match = heading_pattern.match(line)
-            if heading_match:
-                current_heading = heading_match.group(1).strip()
-                inside_target_category = (current_heading == target_category)
-                updated_lines.append(line)
-                continue
-
-            # If not in the target category, just copy the line
-            if not inside_target_category:
-                updated_lines.append(line)
-                continue
-
-            # Skip lines already formatted as markdown links
-            if link_pattern.match(stripped):
-                updated_lines.append(line)
-                continue
-
-            # Convert bare URL to titled markdown link
-            url_match = url_pattern.match(stripped)
-            if url_match:
-                url = url_match.group(1)
-                if stdout:
-                    print(f"🔍 Fetching title for: {url}")
-                title = fetch_title(url)
-                if title:
-                    formatted = f"[{sanitize_title(title)}]({url})\n"
-                    updated_lines.append(formatted)
-                    updated = True
-                    if stdout:
-                        print(f"✅ Converted to: {formatted.strip()}")
-                else:
-                    if stdout:
-                        print(f"⚠️  Could not fetch title for: {url}")
-                    updated_lines.append(line)
-            else:
-                updated_lines.append(line)
-
-    if updated:
-        with open(markdown_file, 'w', encoding='utf-8') as f:
-            f.writelines(updated_lines)
-    elif stdout:
-        print("ℹ️  No bare links found or updated.")
-
-
-def refresh_all_link_titles(markdown_file, stdout=False):
-    link_pattern = re.compile(r'^\s*\[(.*?)\]\((https?://\S+)\)\s*$')
-    heading_pattern = re.compile(r'^##\s+')
-
-    updated_lines = []
-    updated = False
+def _warn_moved(markdown_file, line_number, url):
+    print(f"⚠️  {markdown_file}:{line_number} changed since it was scanned, skipped: {url}", file=sys.stderr)
 
+def report_changes(markdown_file, changes, report_format='diff'):
+    """
+    Stream a report of planned title changes without touching the file.
+    'diff' prints a zero-context unified diff of just the changed lines;
+    'json' prints one JSON object per change (JSON Lines). Lines that no
+    longer hold their planned link are skipped with a warning.
+    """
+    last_line = max(changes)
+    seen = 0
     with open(markdown_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            stripped = line.strip()
-
-            # Leave category headings unchanged
-            if heading_pattern.match(stripped):
-                updated_lines.append(line)
-                continue
-
-            # Match and re-fetch title for any markdown link
-            link_match = link_pattern.match(stripped)
-            if link_match:
-                old_title, url = link_match.groups()
-                if stdout:
-                    print(f"🔁 Re-fetching title for: {url}")
-                title = fetch_title(url)
-                if title:
-                    formatted = f"[{sanitize_title(title)}]({url})\n"
-                    updated_lines.append(formatted)
-                    updated = True
-                    if stdout:
-                        print(f"✅ Updated to: {formatted.strip()}")
+        if report_format == 'diff':
+            print(f"--- {markdown_file}")
+            print(f"+++ {markdown_file}")
+        for line_number, line in enumerate(f, 1):
+            seen = line_number
+            change = changes.get(line_number)
+            if change is not None and not _line_unchanged(line, change):
+                _warn_moved(markdown_file, line_number, change[1])
+            elif change is not None:
+                kind, url, old_title, new_title = change
+                if report_format == 'json':
+                    print(json.dumps({
+                        'file': markdown_file,
+                        'line': line_number,
+                        'url': url,
+                        'old_title': old_title,
+                        'new_title': new_title,
+                    }, ensure_ascii=False))
                 else:
-                    if stdout:
-                        print(f"⚠️  Could not fetch title for: {url}")
-                    updated_lines.append(line)
-                continue
-
-            # Bare URL?
-            url_match = re.match(r'^\s*(https?://\S+)\s*$', stripped)
-            if url_match:
-                url = url_match.group(1)
-                if stdout:
-                    print(f"🔍 Fetching title for bare URL: {url}")
-                title = fetch_title(url)
-                if title:
-                    formatted = f"[{sanitize_title(title)}]({url})\n"
-                    updated_lines.append(formatted)
-                    updated = True
-                    if stdout:
-                        print(f"✅ Converted to: {formatted.strip()}")
+                    old_line = line.rstrip('\n')
+                    new_line = f"[{new_title}]({url})" + old_line[len(old_line.rstrip()):]
+                    print(f"@@ -{line_number} +{line_number} @@")
+                    print(f"-{old_line}")
+                    print(f"+{new_line}")
+            if line_number == last_line:
+                break
+
+    for line_number in sorted(changes):
+        if line_number > seen:
+            _warn_moved(markdown_file, line_number, changes[line_number][1])
+
+def apply_rewrite(markdown_file, plan, titles, stdout=False, report=None):
+    """
+    Stream the file into a temp file, swapping each planned line whose title
+    changed for a titled markdown link, then replace the original with it.
+
+    The fetch stage can take minutes, so every planned line is classified
+    again while streaming and only rewritten if it still holds the same
+    link; lines edited in the meantime are skipped with a warning. Lines
+    whose sanitized title is unchanged don't count, and when nothing changed
+    the file isn't written at all, so its mtime stays put. With
+    report='diff' or 'json' the changes are only reported.
+    Returns the number of lines changed.
+    """
+    fetched = [entry for entry in plan if titles.get(entry[2])]
+    clean_titles = sanitize_titles(titles[url] for _, _, url, _ in fetched)
+    # sanitize_title keeps newlines and tabs; a link has to stay on one line
+    clean_by_line = {entry[0]: ' '.join(title.split()) for entry, title in zip(fetched, clean_titles)}
+
+    changes = {}
+    for line_number, kind, url, old_title in plan:
+        if line_number not in clean_by_line:
+            if stdout:
+                print(f"⚠️  Could not fetch title for: {url}")
+            continue
+        new_title = clean_by_line[line_number]
+        if new_title != old_title:
+            changes[line_number] = (kind, url, old_title, new_title)
+
+    if not changes:
+        if stdout:
+            print("ℹ️  No titles changed.")
+        return 0
+
+    if report:
+        report_changes(markdown_file, changes, report)
+        return len(changes)
+
+    # Write through symlinks: replace the real file, not the link
+    target = os.path.realpath(markdown_file)
+    applied = 0
+    directory = os.path.dirname(target)
+    out = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.tmp', delete=False)
+    try:
+        with out, open(markdown_file, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                change = changes.pop(line_number, None)
+                if change is None:
+                    out.write(line)
+                elif not _line_unchanged(line, change):
+                    _warn_moved(markdown_file, line_number, change[1])
+                    out.write(line)
                 else:
+                    kind, url, _, new_title = change
+                    # Keep the original line ending, including markdown's trailing "  "
+                    out.write(f"[{new_title}]({url})" + line[len(line.rstrip()):])
+                    applied += 1
                     if stdout:
-                        print(f"⚠️  Could not fetch title for: {url}")
-                    updated_lines.append(line)
-            else:
-                updated_lines.append(line)
-
-    if updated:
-        with open(markdown_file, 'w', encoding='utf-8') as f:
-            f.writelines(updated_lines)
-    elif stdout:
-        print("ℹ️  No links updated.")
-
-
-
-def refresh_titles_in_category(markdown_file, target_category, stdout=False):
-    link_pattern = re.compile(r'^\s*\[(.*?)\]\((https?://\S+)\)\s*$')
-    url_pattern = re.compile(r'^\s*(https?://\S+)\s*$')
-    heading_pattern = re.compile(r'^##\s+(.*)$')
-
-    updated_lines = []
-    updated = False
-    inside_target = False
-
-    with open(markdown_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            stripped = line.strip()
+                        action = "Updated" if kind == 'link' else "Converted"
+                        print(f"✅ {action} to: [{new_title}]({url})")
+        # Planned lines past the end of a file that has since shrunk
+        for line_number, change in sorted(changes.items()):
+            _warn_moved(markdown_file, line_number, change[1])
+
+        if applied:
+            shutil.copymode(target, out.name)
+            os.replace(out.name, target)
+        else:
+            os.unlink(out.name)
+    except BaseException:
+        if os.path.exists(out.name):
+            os.unlink(out.name)
+        raise
 
-            # Check if this line is a heading
-            heading_match = heading_pattern.match(stripped)
-            if heading_match:
-                category_name = heading_match.group(1).strip()
-                inside_target = (category_name == target_category)
-                updated_lines.append(line)
-                continue
-
-            if inside_target:
-                # Refresh markdown link
-                link_match = link_pattern.match(stripped)
-                if link_match:
-                    _, url = link_match.groups()
-                    if stdout:
-                        print(f"🔁 Re-fetching title for: {url}")
-                    title = fetch_title(url)
-                    if title:
-                        formatted = f"[{sanitize_title(title)}]({url})\n"
-                        updated_lines.append(formatted)
-                        updated = True
-                        if stdout:
-                            print(f"✅ Updated to: {formatted.strip()}")
-                    else:
-                        updated_lines.append(line)
-                        if stdout:
-                            print(f"⚠️  Could not fetch title for: {url}")
-                    continue
-
-                # Refresh bare URL
-                url_match = url_pattern.match(stripped)
-                if url_match:
-                    url = url_match.group(1)
-                    if stdout:
-                        print(f"🔍 Fetching title for bare URL: {url}")
-                    title = fetch_title(url)
-                    if title:
-                        formatted = f"[{sanitize_title(title)}]({url})\n"
-                        updated_lines.append(formatted)
-                        updated = True
-                        if stdout:
-                            print(f"✅ Converted to: {formatted.strip()}")
-                    else:
-                        updated_lines.append(line)
-                        if stdout:
-                            print(f"⚠️  Could not fetch title for: {url}")
-                    continue
-
-            # Not in target or not a link — leave unchanged
-            updated_lines.append(line)
-
-    if updated:
-        with open(markdown_file, 'w', encoding='utf-8') as f:
-            f.writelines(updated_lines)
-    elif stdout:
-        print("ℹ️  No links updated.")
+    if stdout:
+        if applied:
+            print(f"✅ {markdown_file} updated with {applied} new title(s).")
+        else:
+            print("ℹ️  No titles changed.")
+    return applied
 
+def rewrite_titles(paths, selector, stdout=False, report=None, archives=None):
+    """
+    Give every selected link line in the files a freshly fetched title.
+
+    Each file is classified in a single pass, the selected URLs of all files
+    are fetched as one batch through the shared fetch pool, and each file is
+    then streamed through once more to write the new titles. ``archives``
+    maps a path to the archive its pages go to. With ``report`` ('diff' or
+    'json') nothing is written, pages aren't archived, and progress output
+    goes to stderr so stdout carries only the report. Returns the number of
+    lines changed.
+    """
+    archives = {} if report else (archives or {})
+
+    # Keep stdout clean for the report, including fetch warnings
+    with contextlib.redirect_stdout(sys.stderr) if report else contextlib.nullcontext():
+        plans = {}
+        pending = {}
+        for path in paths:
+            plans[path], _ = scan_links(path, selector)
+            for _, _, url, _ in plans[path]:
+                archive = archives.get(path)
+                pending.setdefault(url, [])
+                if archive is not None and archive not in pending[url]:
+                    pending[url].append(archive)
+
+        titles = {}
+        if pending:
+            if stdout:
+                print(f"🔍 Fetching {len(pending)} title(s)...")
+            titles = fetch_titles(pending)
+
+    updated = 0
+    for path in paths:
+        if stdout and len(paths) > 1 and not report:
+            print(f"\n📄 {path}")
+        updated += apply_rewrite(path, plans[path], titles, stdout and not report, report)
+
+    if stdout and report and not updated:
+        print("ℹ️  No titles would change.", file=sys.stderr)
+
+    return updated
 
 def delete_link(file_path, url, category):
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -552,30 +694,114 @@ def delete_link(file_path, url, category):
         print("⚠️  Link not found.")
 
 
+def default_archive_dir(markdown_file):
+    """Archive directory that sits next to the markdown file."""
+    return os.path.splitext(markdown_file)[0] + '.archive'
+
+
+def parse_markdown_files(paths):
+    """
+    Parse several markdown files, in parallel worker processes when there is
+    more than one. Returns a dict of path -> categorized links.
+    """
+    if len(paths) == 1:
+        return {paths[0]: parse_markdown(paths[0])}
+    with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as pool:
+        return dict(zip(paths, pool.map(parse_markdown, paths)))
+
+
+def search_links(links_by_file, query, archive_dirs=()):
+    """
+    Print links whose title or URL contains the query, then any archived
+    pages whose text contains it. Archives are searched offline.
+    """
+    needle = query.lower()
+    found = 0
+
+    for path, categorized_links in links_by_file.items():
+        source = f"{os.path.basename(path)} " if len(links_by_file) > 1 else ""
+        for heading, links in categorized_links.items():
+            for link_text, link_url in links:
+                if needle in link_text.lower() or needle in link_url.lower():
+                    print(sanitize_terminal_output(f"🔖 {source}[{heading}] {link_text} - {link_url}"))
+                    found += 1
+
+    for archive_dir in dict.fromkeys(archive_dirs):
+        if not os.path.isdir(archive_dir):
+            continue
+        archive = PageArchive(archive_dir)
+        for url, snippet in archive.search(query):
+            print(sanitize_terminal_output(f"📦 {url}\n    …{snippet}…"))
+            found += 1
+
+    if not found:
+        print(f"ℹ️  No matches for: {query}")
+
+
+def non_negative_int(value):
+    """argparse type for counts that may be zero but not negative."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {value}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(description="Manage categorized links in a markdown file.")
-    parser.add_argument('--path', required=True, help="Path to the markdown file")
+    parser.add_argument('--path', required=True, nargs='+', help="Path to the markdown file (several for --random, --search and --fix-titles)")
 
     group = parser.add_mutually_exclusive_group()
     group.add_argument('--random', action='store_true', help="Open a random link")
-    group.add_argument('--add', nargs='+', metavar=('URL', 'CATEGORY', 'TITLE'), help="Add a link: URL CATEGORY [TITLE]")
+    group.add_argument('--add', nargs='+', metavar=('URL', 'CATEGORY [TITLE]'), help="Add a link: URL CATEGORY [TITLE]")
     group.add_argument('--delete', nargs=2, metavar=('URL', 'CATEGORY'), help="Delete a link")
     group.add_argument('--fix-titles', action='store_true', help="Fetch and update missing link titles")
+    group.add_argument('--search', metavar='QUERY', help="Search link titles, URLs and archived page text")
 
-    parser.add_argument("--category", type=str, help="Specify a category to operate within")
+    parser.add_argument("--category", nargs='+', help="Specify one or more categories to operate within")
+    parser.add_argument("--weight", choices=('uniform', 'category', 'recent'), default='uniform', help="How --random weighs links: every link, every category or newer links favoured")
+    parser.add_argument("--history", type=non_negative_int, default=20, metavar='N', help="Avoid the last N links shown by --random (0 disables)")
+    parser.add_argument("--match", nargs='+', metavar='GLOB', help="Only fix titles for URLs matching these globs")
     parser.add_argument("--refresh", action="store_true", help="Refresh all link titles instead of only fixing bare ones")
+    parser.add_argument("--dry-run", action="store_true", help="Report the title changes --fix-titles would make without writing")
+    parser.add_argument("--format", choices=('diff', 'json'), default='diff', help="Report format for --dry-run")
     parser.add_argument("-a", "--auto", action="store_true", help="Automatically fetch title from URL when adding a link")
     parser.add_argument("-p", "--prompt", action="store_true", help="Prompt user to enter title manually when adding a link")
+    parser.add_argument("--archive", action="store_true", help="Store fetched pages in the offline archive")
+    parser.add_argument("--archive-dir", type=str, help="Archive directory (default: <file>.archive next to the markdown file)")
+    parser.add_argument("--archive-format", choices=('text', 'raw'), default='text', help="Archive pages stripped to text or as raw HTML")
+    parser.add_argument("--archive-codec", choices=('zlib', 'lzma'), default='zlib', help="Compression used for archived pages")
 
     args = parser.parse_args()
-    markdown_file = args.path
+    paths = list(dict.fromkeys(args.path))
+    markdown_file = paths[0]
+
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        for path in missing:
+            print(f"File does not exist: {path}")
+        return
 
-    if not os.path.exists(markdown_file):
-        print("File does not exist.")
+    if len(paths) > 1 and not (args.random or args.search or args.fix_titles):
+        print("❌ Multiple paths are only supported with --random, --search and --fix-titles.")
         return
 
-    # Parse markdown to dictionary structure
-    categorized_links = parse_markdown(markdown_file)
+    # Parse markdown to dictionary structure; --random and --fix-titles stream the files instead
+    links_by_file, categorized_links = None, None
+    if not (args.random or args.fix_titles or args.delete):
+        links_by_file = parse_markdown_files(paths)
+        categorized_links = links_by_file[markdown_file]
+
+    archives = {}
+
+    def archive_for(path):
+        """Open (once) the archive a file's fetched pages go to, if archiving."""
+        if not args.archive:
+            return None
+        archive_dir = args.archive_dir or default_archive_dir(path)
+        if archive_dir not in archives:
+            archives[archive_dir] = PageArchive(archive_dir, mode=args.archive_format, codec=args.archive_codec)
+        return archives[archive_dir]
+
 
     if args.add:
         url = args.add[0]
@@ -596,45 +822,47 @@ def main():
         if not title and not auto_fetch and not prompt_title:
             prompt_title = True
 
-        add_link(markdown_file, title, url, category, categorized_links, auto_fetch, prompt_title)
+        add_link(markdown_file, title, url, category, categorized_links, auto_fetch, prompt_title, archive_for(markdown_file))
 
     elif args.delete:
         url, category = args.delete
         delete_link(markdown_file, url, category)
 
+    elif args.search:
+        archive_dirs = [args.archive_dir or default_archive_dir(path) for path in paths]
+        search_links(links_by_file, args.search, archive_dirs)
+
     elif args.random:
-        selected_url = random_link(categorized_links)
-        if selected_url:
+        rings = {path: RecentRing(recent_ring_path(path), args.history) for path in paths}
+        recent = {url for ring in rings.values() for url in ring}
+        last = {ring.last for ring in rings.values()} - {None}
+        picked = pick_random_link(paths, args.weight, args.category, recent, last)
+        if picked:
+            path, selected_url = picked
+            rings[path].add(selected_url)
             open_in_browser(selected_url)
-    elif args.fix_titles:
-        if args.refresh:
-            if args.category:
-                # Refresh all link titles in a specific category
-                refresh_titles_in_category(markdown_file, args.category, stdout=True)
-            else:
-                # Refresh all link titles across the whole file
-                refresh_all_link_titles(markdown_file, stdout=True)
         else:
-            if args.category:
-                # Fix bare links in a specific category
-                fix_bare_links_in_category(markdown_file, args.category, stdout=True)
-            else:
-                # Fix all bare links in the file
-                fix_bare_links(markdown_file, stdout=True)
-        # For All missing links in file (default no extra params)
-        # fix_bare_links(markdown_file)
-
-        # For missing links in category (category="category flag exists")
-        # fix_bare_links_in_category(markdown_file,"Hacker Mode 👨‍💻", stdout=True)
+            print("No links available.")
 
-        # Refresh all link titles in category (category flag exist & refresh flag bool)
-        # refresh_titles_in_category(markdown_file,"Hacker Mode 👨‍💻", stdout=True)
-
-        # Refresh all links over the file (refresh flag exists)
-        # refresh_all_link_titles(markdown_file, stdout=True)
+    elif args.fix_titles:
+        kinds = ('bare', 'link') if args.refresh else ('bare',)
+        selectors = [select_kinds(*kinds)]
+        if args.category:
+            selectors.append(select_categories(args.category))
+        if args.match:
+            selectors.append(select_url_globs(args.match))
+        file_archives = {} if args.dry_run else {path: archive_for(path) for path in paths}
+        report = args.format if args.dry_run else None
+        rewrite_titles(paths, combine_selectors(*selectors), stdout=True, report=report, archives=file_archives)
     else:
         selected_url = display_menu(categorized_links)
         open_in_browser(selected_url)
 
+    # Refreshes supersede old page versions; reclaim them once they pile up
+    for archive in archives.values():
+        reclaimed = archive.compact(COMPACT_GARBAGE_RATIO)
+        if reclaimed:
+            print(f"🧹 Compacted archive {archive.root}, reclaimed {reclaimed:,} bytes.")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
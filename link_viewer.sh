@@ -126,3 +126,20 @@ mddel() {
     local file_path="${MD_FILES[$key]}"
     "$PY_COMMAND" "$MD_SCRIPT" --path="$file_path" --delete "$url" "$category"
 }
+
+# Operations across every registered link file
+mdrandom() {
+    "$PY_COMMAND" "$MD_SCRIPT" --path "${MD_FILES[@]}" --random
+}
+
+mdsearch() {
+    if [[ -z "$1" ]]; then
+        echo "Usage: mdsearch <query>"
+        return 1
+    fi
+    "$PY_COMMAND" "$MD_SCRIPT" --path "${MD_FILES[@]}" --search "$*"
+}
+
+mdfixall() {
+    "$PY_COMMAND" "$MD_SCRIPT" --path "${MD_FILES[@]}" --fix-titles "$@"
+}
@@ -3,6 +3,7 @@ import re
 import sys
 import webbrowser
 from collections import defaultdict
+from sampling import RecentRing, reservoir_choice
 
 def parse_markdown(filepath):
     with open(filepath, 'r', encoding='utf-8') as f:
@@ -118,9 +119,32 @@ def browse(data):
         print(f"\n--- {selected_item} ---")
         print(data[selected_category]["entries"][selected_item])
 
+def random_item(data, filepath):
+    """Show a random entry or open a random link, avoiding recently shown ones."""
+    ring = RecentRing(filepath + ".recent")
+    items = (
+        (category, kind, name)
+        for category, content in data.items()
+        for kind, name in [("entry", heading) for heading in content["entries"]]
+                          + [("link", url) for _, url in content["links"]]
+    )
+    picked = reservoir_choice(items, avoid=ring, last=ring.last, key=lambda item: f"{item[0]}\t{item[2]}")
+    if picked is None:
+        print("No entries or links to choose from.")
+        return
+
+    category, kind, name = picked
+    ring.add(f"{category}\t{name}")
+    if kind == "link":
+        print(f"Opening {name}...")
+        webbrowser.open(name)
+    else:
+        print(f"\n--- {name} ({category}) ---")
+        print(data[category]["entries"][name])
+
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python md_browser.py <markdown_file> [browse|add|delete]")
+        print("Usage: python md_browser.py <markdown_file> [browse|add|delete|--random]")
         return
 
     filepath = sys.argv[1]
@@ -137,9 +161,11 @@ def main():
         add_entry(data, filepath)
     elif action == "delete":
         delete_entry(data, filepath)
+    elif action in ("random", "--random"):
+        random_item(data, filepath)
     else:
         print(f"Unknown action: {action}")
-        print("Valid actions: browse, add, delete")
+        print("Valid actions: browse, add, delete, --random")
 
 if __name__ == "__main__":
     main()
@@ -47,4 +47,13 @@ notedel() {
     fi
     local file_path="${NOTE_FILES[$key]}"
     "$PY_COMMAND" "$NOTES_MD_SCRIPT" "$file_path" "delete"
-}
\ No newline at end of file
+}
+
+# Search links in every registered note file
+notesearch() {
+    if [[ -z "$1" ]]; then
+        echo "Usage: notesearch <query>"
+        return 1
+    fi
+    "$PY_COMMAND" "$MD_SCRIPT" --path "${NOTE_FILES[@]}" --search "$*"
+}
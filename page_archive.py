@@ -0,0 +1,293 @@
+import hashlib
+import html
+import lzma
+import os
+import re
+import threading
+import time
+import zlib
+
+# Segments are append-only pack files; a new one is started once the
+# current segment grows past this size.
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+INDEX_NAME = 'index.tsv'
+
+# Compact once superseded page versions make up more than this share of the archive
+COMPACT_GARBAGE_RATIO = 0.5
+
+CODECS = {
+    'zlib': (lambda data: zlib.compress(data, 6), zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+}
+
+# Openers of content that isn't page text, and what closes each of them
+_hidden_open = re.compile(r'<(script|style|noscript)\b|<!--', re.IGNORECASE)
+_hidden_close = {
+    'script': re.compile(r'</script\s*>', re.IGNORECASE),
+    'style': re.compile(r'</style\s*>', re.IGNORECASE),
+    'noscript': re.compile(r'</noscript\s*>', re.IGNORECASE),
+    None: re.compile(r'-->'),
+}
+# No '<' inside, so a run of unclosed '<' can't make each attempt rescan the page
+_tag = re.compile(r'<[^<>]+>')
+_whitespace = re.compile(r'\s+')
+
+
+def _drop_hidden(markup):
+    """
+    Remove scripts, styles, noscript blocks and comments in one linear scan.
+    Each opener is matched with the next closer of its kind; an opener that
+    is never closed hides the rest of the page, as it would in a browser.
+    """
+    parts = []
+    position = 0
+    while True:
+        opener = _hidden_open.search(markup, position)
+        if opener is None:
+            parts.append(markup[position:])
+            break
+        parts.append(markup[position:opener.start()])
+        parts.append(' ')
+        tag = opener.group(1)
+        closer = _hidden_close[tag.lower() if tag else None].search(markup, opener.end())
+        if closer is None:
+            break
+        position = closer.end()
+    return ''.join(parts)
+
+
+def html_to_text(markup):
+    """
+    Strip scripts, styles, comments and tags from HTML and collapse whitespace.
+    """
+    markup = _tag.sub(' ', _drop_hidden(markup))
+    return _whitespace.sub(' ', html.unescape(markup)).strip()
+
+
+class PageArchive:
+    """
+    Content-addressed store for fetched pages.
+
+    Page bodies are keyed by the SHA-256 of their stored form, so identical
+    pages are only written once. Bodies are compressed and appended to
+    segment files; ``index.tsv`` is an append-only log mapping digests to
+    their segment location and URLs to their latest digest. The whole index
+    is loaded into memory so lookups never touch the segments.
+
+    When a page changes, its URL points at the new blob and the old one
+    becomes garbage; ``compact`` reclaims it.
+    """
+
+    def __init__(self, root, mode='text', codec='zlib'):
+        if mode not in ('text', 'raw'):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        if codec not in CODECS:
+            raise ValueError(f"Unknown archive codec: {codec}")
+        self.root = root
+        self.mode = mode
+        self.codec = codec
+        self.blobs = {}  # digest -> (segment, offset, length, codec, mode)
+        self.urls = {}   # url -> (digest, fetched_at)
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._index_path = os.path.join(root, INDEX_NAME)
+        self._load_index()
+        self._segment = self._latest_segment()
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                fields = line.rstrip('\n').split('\t')
+                if fields[0] == 'B' and len(fields) == 7:
+                    _, digest, segment, offset, length, codec, mode = fields
+                    self.blobs[digest] = (int(segment), int(offset), int(length), codec, mode)
+                elif fields[0] == 'U' and len(fields) == 4:
+                    _, url, digest, fetched_at = fields
+                    self.urls[url] = (digest, float(fetched_at))
+
+    @staticmethod
+    def _blob_line(digest, entry):
+        return '\t'.join(['B', digest] + [str(field) for field in entry])
+
+    @staticmethod
+    def _url_line(url, digest, fetched_at):
+        return f"U\t{url}\t{digest}\t{fetched_at:.0f}"
+
+    def _segment_path(self, segment):
+        return os.path.join(self.root, f"segment-{segment:05d}.pack")
+
+    def _latest_segment(self):
+        segments = [entry[0] for entry in self.blobs.values()]
+        return max(segments) if segments else 0
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __contains__(self, url):
+        return url in self.urls
+
+    def store(self, url, markup):
+        """
+        Archive a fetched page for ``url`` and return its digest.
+        """
+        body = html_to_text(markup) if self.mode == 'text' else markup
+        payload = body.encode('utf-8')
+        digest = hashlib.sha256(payload).hexdigest()
+
+        # Compress outside the lock so concurrent fetches aren't serialized
+        compress = CODECS[self.codec][0]
+        compressed = None if digest in self.blobs else compress(payload)
+
+        with self._lock:
+            index_lines = []
+            if digest not in self.blobs:
+                if compressed is None:
+                    compressed = compress(payload)
+                path = self._segment_path(self._segment)
+                if os.path.exists(path) and os.path.getsize(path) >= SEGMENT_MAX_BYTES:
+                    self._segment += 1
+                    path = self._segment_path(self._segment)
+                with open(path, 'ab') as f:
+                    offset = f.tell()
+                    f.write(compressed)
+                entry = (self._segment, offset, len(compressed), self.codec, self.mode)
+                self.blobs[digest] = entry
+                index_lines.append(self._blob_line(digest, entry))
+
+            if self.urls.get(url, (None,))[0] != digest:
+                fetched_at = time.time()
+                self.urls[url] = (digest, fetched_at)
+                index_lines.append(self._url_line(url, digest, fetched_at))
+
+            if index_lines:
+                with open(self._index_path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(index_lines) + '\n')
+        return digest
+
+    def garbage_ratio(self):
+        """
+        Share of stored bytes held by blobs no URL points at any more, e.g.
+        old versions of pages that changed on a later refresh.
+        """
+        live = {digest for digest, _ in self.urls.values()}
+        total = dead = 0
+        for digest, entry in self.blobs.items():
+            total += entry[2]
+            if digest not in live:
+                dead += entry[2]
+        return dead / total if total else 0.0
+
+    def compact(self, min_garbage_ratio=0.0):
+        """
+        Reclaim space from superseded blobs once they make up more than
+        min_garbage_ratio of the archive. Live blobs are copied into fresh
+        segments, a new index is swapped in atomically, and only then are
+        the old segments deleted, so a crash midway loses nothing.
+        Returns the number of bytes reclaimed.
+        """
+        with self._lock:
+            if not self.blobs or self.garbage_ratio() <= min_garbage_ratio:
+                return 0
+
+            old_segments = {entry[0] for entry in self.blobs.values()}
+            old_size = sum(os.path.getsize(self._segment_path(segment)) for segment in old_segments
+                           if os.path.exists(self._segment_path(segment)))
+            live = {digest for digest, _ in self.urls.values()}
+
+            segment, out = max(old_segments) + 1, None
+            blobs = {}
+            source, source_segment = None, None
+            try:
+                for digest in sorted(live, key=lambda digest: self.blobs[digest][:2]):
+                    entry = self.blobs[digest]
+                    if entry[0] != source_segment:
+                        if source:
+                            source.close()
+                        source = open(self._segment_path(entry[0]), 'rb')
+                        source_segment = entry[0]
+                    source.seek(entry[1])
+                    data = source.read(entry[2])
+
+                    if out is None or out.tell() >= SEGMENT_MAX_BYTES:
+                        if out:
+                            out.close()
+                            segment += 1
+                        out = open(self._segment_path(segment), 'ab')
+                    blobs[digest] = (segment, out.tell(), len(data)) + entry[3:]
+                    out.write(data)
+            finally:
+                if source:
+                    source.close()
+                if out:
+                    out.close()
+
+            index_tmp = self._index_path + '.tmp'
+            with open(index_tmp, 'w', encoding='utf-8') as f:
+                for digest, entry in blobs.items():
+                    f.write(self._blob_line(digest, entry) + '\n')
+                for url, (digest, fetched_at) in self.urls.items():
+                    f.write(self._url_line(url, digest, fetched_at) + '\n')
+            os.replace(index_tmp, self._index_path)
+
+            for old in old_segments:
+                if os.path.exists(self._segment_path(old)):
+                    os.remove(self._segment_path(old))
+
+            self.blobs = blobs
+            self._segment = segment if out else self._segment
+            new_size = sum(entry[2] for entry in blobs.values())
+            return old_size - new_size
+
+    def _decode(self, entry, compressed):
+        _, _, _, codec, mode = entry
+        body = CODECS[codec][1](compressed).decode('utf-8')
+        return html_to_text(body) if mode == 'raw' else body
+
+    def get_text(self, url):
+        """
+        Return the archived text for ``url``, or None if it was never archived.
+        """
+        if url not in self.urls:
+            return None
+        entry = self.blobs[self.urls[url][0]]
+        segment, offset, length = entry[:3]
+        with open(self._segment_path(segment), 'rb') as f:
+            f.seek(offset)
+            return self._decode(entry, f.read(length))
+
+    def search(self, query, context=60):
+        """
+        Yield ``(url, snippet)`` for every archived page whose text contains
+        ``query`` (case-insensitive). Blobs are read in segment order so each
+        segment is scanned front to back once.
+        """
+        needle = query.lower()
+        urls_by_digest = {}
+        for url, (digest, _) in self.urls.items():
+            urls_by_digest.setdefault(digest, []).append(url)
+
+        ordered = sorted(urls_by_digest, key=lambda digest: self.blobs[digest][:2])
+        handle, open_segment = None, None
+        try:
+            for digest in ordered:
+                entry = self.blobs[digest]
+                segment, offset, length = entry[:3]
+                if segment != open_segment:
+                    if handle:
+                        handle.close()
+                    handle = open(self._segment_path(segment), 'rb')
+                    open_segment = segment
+                handle.seek(offset)
+                text = self._decode(entry, handle.read(length))
+                position = text.lower().find(needle)
+                if position < 0:
+                    continue
+                start = max(0, position - context)
+                snippet = text[start:position + len(query) + context]
+                for url in urls_by_digest[digest]:
+                    yield url, snippet
+        finally:
+            if handle:
+                handle.close()
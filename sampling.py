@@ -0,0 +1,93 @@
+import math
+import os
+import random
+import tempfile
+from collections import deque
+
+
+class Reservoir:
+    """
+    Single-item weighted reservoir (Efraimidis-Spirakis A-Res with k=1).
+
+    Items are offered one at a time and only the current pick is kept, so a
+    stream of any length is sampled in one pass with O(1) memory. Each item
+    ends up chosen with probability proportional to its weight.
+    """
+
+    def __init__(self, rng=random):
+        self.rng = rng
+        self.item = None
+        # Keys from reservoirs over disjoint streams can be compared, so the
+        # pick with the highest key is a valid pick over the combined stream
+        self.key = -math.inf
+
+    def __bool__(self):
+        return self.key > -math.inf
+
+    def offer(self, item, weight=1.0):
+        if weight <= 0:
+            return
+        # log(u ** (1 / w)), kept in log space to avoid underflow
+        key = math.log(1.0 - self.rng.random()) / weight
+        if key > self.key:
+            self.key = key
+            self.item = item
+
+
+def reservoir_choice(items, weight=None, avoid=(), last=None, key=None, rng=random):
+    """
+    Pick one item from an iterable in a single streaming pass.
+
+    weight(item) gives relative weights (uniform when None). Items whose
+    key(item) is in avoid are only picked if every item is avoided, and the
+    one equal to last only if it is the sole item. Returns None for an empty
+    iterable.
+    """
+    fresh, avoided, repeat = Reservoir(rng), Reservoir(rng), Reservoir(rng)
+    for item in items:
+        item_key = key(item) if key else item
+        if item_key == last:
+            reservoir = repeat
+        elif item_key in avoid:
+            reservoir = avoided
+        else:
+            reservoir = fresh
+        reservoir.offer(item, 1.0 if weight is None else weight(item))
+    return (fresh or avoided or repeat).item
+
+
+class RecentRing:
+    """
+    Small persistent ring of recently shown items, stored one per line in a
+    sidecar file, oldest first. A size of 0 disables it.
+    """
+
+    def __init__(self, path, size=20):
+        self.path = path
+        self.items = deque(maxlen=size)
+        if size and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.items.extend(line.rstrip('\n') for line in f if line.strip())
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    @property
+    def last(self):
+        """The most recently shown item, or None."""
+        return self.items[-1] if self.items else None
+
+    def add(self, item):
+        if self.items.maxlen == 0:
+            return
+        if item in self.items:
+            self.items.remove(item)
+        self.items.append(item)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.tmp', delete=False) as f:
+            f.writelines(f"{entry}\n" for entry in self.items)
+        os.replace(f.name, self.path)
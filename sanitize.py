@@ -0,0 +1,107 @@
+import re
+import string
+
+# ANSI escape sequences (CSI and two-byte escapes)
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+# Control characters other than newline and tab
+CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b-\x1f]+')
+
+# Characters a title may contain besides alphanumerics
+TITLE_ALLOWED = frozenset(string.printable + "★☆♡♥✨✿✼♪⋆★→←↑↓&*/|" + " .-_#()")
+
+# Substitutions applied to titles before filtering
+TITLE_REPLACEMENTS = {
+    '[': '',
+    ']': '',
+    '%': '﹪',  # Small percent sign (U+FE6A); not alphanumeric, so the filter drops it too
+}
+
+MAX_TITLE_LENGTH = 200
+
+# Joins ASCII titles in a batch. It can't start or extend an ANSI sequence
+# and sanitizing would drop it, so it only survives where we put it.
+_BATCH_SEPARATOR = '\x00'
+
+
+def _is_control(char):
+    """Control characters other than newline and tab."""
+    return ord(char) < 32 and char not in '\n\t'
+
+
+class _TitleTable(dict):
+    """
+    str.translate table for titles, filled in lazily: each character's
+    outcome (kept, replaced or dropped) is worked out on first sight and
+    cached, so every later title is a single C-level translate.
+    """
+
+    def __init__(self, keep=()):
+        super().__init__((ord(char), char) for char in keep)
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        if _is_control(char):
+            result = None
+        else:
+            replaced = TITLE_REPLACEMENTS.get(char, char)
+            result = ''.join(c for c in replaced if c in TITLE_ALLOWED or c.isalnum()) or None
+        self[codepoint] = result
+        return result
+
+
+TITLE_TABLE = _TitleTable()
+_BATCH_TABLE = _TitleTable(keep=_BATCH_SEPARATOR)
+
+
+def _strip_ansi(text):
+    return ANSI_ESCAPE.sub('', text) if '\x1b' in text else text
+
+
+def _truncate(title):
+    if len(title) > MAX_TITLE_LENGTH:
+        return title[:MAX_TITLE_LENGTH] + '...'
+    return title
+
+
+def sanitize_terminal_output(text):
+    """Remove ANSI escape codes and control characters from text."""
+    return CONTROL_CHARS.sub('', _strip_ansi(text))
+
+
+def sanitize_title(title):
+    """
+    Make a fetched or typed title safe for a markdown link: strip escape
+    codes and control characters, drop brackets and percent signs, keep
+    readable characters and cap the length.
+    """
+    return _truncate(_strip_ansi(title).translate(TITLE_TABLE))
+
+
+def sanitize_titles(titles):
+    """
+    Sanitize a list of titles in one call. Returns the same results as
+    calling sanitize_title on each.
+
+    ASCII titles, the common case, are joined and cleaned with a single
+    regex pass and translate, which hits str.translate's ASCII fast path.
+    Other titles are cleaned one by one, since joining them would push the
+    ASCII ones off that fast path too.
+    """
+    titles = list(titles)
+    results = [None] * len(titles)
+
+    batch = []
+    for index, title in enumerate(titles):
+        if title.isascii() and _BATCH_SEPARATOR not in title:
+            batch.append(index)
+        else:
+            results[index] = sanitize_title(title)
+
+    if batch:
+        joined = _BATCH_SEPARATOR.join(titles[index] for index in batch)
+        cleaned = _strip_ansi(joined).translate(_BATCH_TABLE).split(_BATCH_SEPARATOR)
+        for index, title in zip(batch, cleaned):
+            results[index] = _truncate(title)
+
+    return results